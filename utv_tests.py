@@ -416,205 +416,371 @@ class GaussianQRTests(GaussianMatrixTest):
                     self.assertTrue(error < thresh, msg=errormsg)
         self.iterloop(impl)
 
+    def test_compactWY_reconstruction(self, thresh=1E-6):
+        """
+        Runs the qr decomposition in 'compactWY' mode, explicitly forms
+        Q from the outputs using qr.compactWY_to_Q, and checks that Q is
+        unitary, and that QR = A to within Frobenius norm 'thresh'.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                with self.assertRaises(NotImplementedError):
+                    qr.house_qr(A, mode="compactWY")
+                return
+            Y, T, R = qr.house_qr(A, mode="compactWY")
+            Q = qr.compactWY_to_Q(Y, T)
+            Id = jnp.eye(m, dtype=dtype)
+            err, errmsg = errstring(dag(Q)@Q, "QHQ", Id, "I")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+            err, errmsg = errstring(A, "A", Q@R, "QR")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+        self.iterloop(impl)
 
+    def test_B_times_Q_compactWY(self, thresh=1E-6):
+        """
+        Makes sure that B @ Q computed implicitly from Y and T by
+        qr.B_times_Q_compactWY agrees with B @ qr.compactWY_to_Q(Y, T).
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                return
+            Y, T, _ = qr.house_qr(A, mode="compactWY")
+            B = matutils.gaussian_random(shape=(n, m), dtype=dtype)
+            BQ = B @ qr.compactWY_to_Q(Y, T)
+            BQ_YT = qr.B_times_Q_compactWY(B, Y, T)
+            err, errmsg = errstring(BQ, "BQ", BQ_YT, "B(I-YTY^H)")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+        self.iterloop(impl)
 
+    def test_Qdag_compactWY_times_B(self, thresh=1E-6):
+        """
+        Makes sure that Q^H @ B computed implicitly from Y and T by
+        qr.Qdag_compactWY_times_B agrees with dag(qr.compactWY_to_Q(Y, T)) @ B.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                return
+            Y, T, _ = qr.house_qr(A, mode="compactWY")
+            B = matutils.gaussian_random(shape=(m, n), dtype=dtype)
+            QHB = dag(qr.compactWY_to_Q(Y, T)) @ B
+            QHB_YT = qr.Qdag_compactWY_times_B(B, Y, T)
+            err, errmsg = errstring(QHB, "QHB", QHB_YT, "(I-YTY^H)^H @ B")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+        self.iterloop(impl)
 
+    def test_WY_mixed_precision(self, thresh=1E-2):
+        """
+        Checks that qr.factored_to_WY with dtype_compute=jnp.bfloat16
+        returns W and YH in the dtype of H, and that the resulting Q is
+        unitary and agrees with the full-precision Q to within a tolerance
+        appropriate to bfloat16. Also checks that complex H with a real
+        dtype_compute raises ValueError.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                return
+            H, betas = qr.house_qr(A, mode="factored")
+            W, YH = qr.factored_to_WY([H, betas], dtype_compute=jnp.bfloat16)
+            self.assertEqual(W.dtype, H.dtype)
+            self.assertEqual(YH.dtype, H.dtype)
+            Q = qr.WY_to_Q(W, YH)
+            Q_ref = qr.WY_to_Q(*qr.factored_to_WY([H, betas]))
+            err, errmsg = errstring(Q, "bf16 Q", Q_ref, "Q")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+            Id = jnp.eye(m, dtype=dtype)
+            err, errmsg = errstring(dag(Q)@Q, "QHQ", Id, "I")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+
+            Hc = jnp.asarray(H).astype(jnp.complex64)
+            with self.assertRaises(ValueError):
+                qr.factored_to_WY([Hc, betas], dtype_compute=jnp.bfloat16)
+        self.iterloop(impl)
 
+    @unittest.skipIf(qr.numba is None, "Numba is not installed.")
+    def test_numba_factored_QR(self, thresh=1E-6):
+        """
+        Checks that the Numba kernel used by qr.house_qr(mode="factored")
+        for small matrices on CPU agrees with the Jax implementation, for
+        real and complex input, and for input whose first column is zero
+        or has a zero leading entry.
+        """
+        # getattr avoids the name mangling of __ inside the class body.
+        numba_qr = getattr(qr, "__house_qr_factored_numba")
+        jax_qr = getattr(qr, "__house_qr_factored")
 
-    #  def test_forward_vs_backward_accumulation(self, thresh=1E-6):
-    #      """
-    #      Checks that Q computed from the factored representation gives the
-    #      same result when using either forward or backward accumulation.
-    #      """
-    #      def impl(A, paramtup):
-    #          m, n, dtype = paramtup
-    #          if n > m:
-    #              with self.assertRaises(NotImplementedError):
-    #                  H, betas = qr.house_qr(A, mode="factored")
-    #              return
-    #          H, betas = qr.house_qr(A, mode="factored")
-    #          Im = jnp.eye(m, dtype=A.dtype)
-    #          Qforward = qr.factored_rightmult(Im, H, betas)
-    #          Qbackward, R = qr.factored_to_QR(H, betas)
-    #          err, errmsg = errstring(Qforward, "Qforward", Qbackward,
-    #                                  "Qbackward")
-    #          self.assertTrue(err < thresh, msg=errmsg)
-    #      self.iterloop(impl)
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                return
+            Ac = A + 1.0j * matutils.gaussian_random(shape=A.shape,
+                                                    dtype=A.dtype)
+            A0 = jax.ops.index_update(A, jax.ops.index[:, 0], 0.)
+            A00 = jax.ops.index_update(A, jax.ops.index[0, 0], 0.)
+            cases = [("real", A), ("complex", Ac), ("zero col", A0),
+                     ("zero lead", A00)]
+            for name, B in cases:
+                with self.subTest(input=name):
+                    H_n, beta_n = numba_qr(B)
+                    H_j, beta_j = jax_qr(B)
+                    self.assertTrue(jnp.all(jnp.isfinite(H_n)))
+                    self.assertEqual(H_n.dtype, H_j.dtype)
+                    self.assertEqual(beta_n.dtype, beta_j.dtype)
+                    err, errmsg = errstring(H_j, "jax H", H_n, "numba H")
+                    self.assertLessEqual(err, thresh, msg=errmsg)
+                    err, errmsg = errstring(beta_j, "jax beta", beta_n,
+                                            "numba beta")
+                    self.assertLessEqual(err, thresh, msg=errmsg)
+        self.iterloop(impl)
 
-    #  def test_factored_mult(self, thresh=1E-5):
-    #      """
-    #      A = QR -> [H, tau] is computed. R is extracted. We compare
-    #      C * A with C * Q * R without forming Q explicitly.
-    #      """
-    #      def impl(A, paramtup):
-    #          m, n, dtype = paramtup
+    def test_batched_factored_QR(self, thresh=1E-6):
+        """
+        Checks that qr.house_qr_batched, applied to a stack of matrices,
+        agrees with qr.house_qr(mode="factored") applied to each.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            A_batch = jnp.stack([A, 2*A, -A])
+            if n > m:
+                with self.assertRaises(NotImplementedError):
+                    qr.house_qr_batched(A_batch)
+                return
+            H_batch, beta_batch = qr.house_qr_batched(A_batch)
+            for A_i, H_i, beta_i in zip(A_batch, H_batch, beta_batch):
+                H, beta = qr.house_qr(A_i, mode="factored")
+                err, errmsg = errstring(H, "H", H_i, "batched H")
+                self.assertLessEqual(err, thresh, msg=errmsg)
+                err, errmsg = errstring(beta, "beta", beta_i, "batched beta")
+                self.assertLessEqual(err, thresh, msg=errmsg)
+        self.iterloop(impl)
 
-    #          C = matutils.gaussian_random(shape=(n, m), dtype=dtype)
-    #          if n > m:
-    #              with self.assertRaises(NotImplementedError):
-    #                  H, betas = qr.house_qr(A, mode="factored")
-    #              return
-    #          H, betas = qr.house_qr(A, mode="factored")
-    #          R = jnp.triu(H)
-
-    #          CA = jnp.dot(C, A)
-    #          CQ = qr.factored_rightmult(C, H, betas)
-    #          CQR = CQ@R
-    #          err, errmsg = errstring(CA, "CA", CQR, "CQR")
-    #          self.assertTrue(err < thresh, msg=errmsg)
-    #      self.iterloop(impl)
 
-    #  def test_factored_to_dense_Q(self, thresh=1E-6):
-    #      """
-    #      Runs the qr decomposition in 'factored' mode. Factored mode returns
-    #      matrices H and tau that record the Householder transformations
-    #      from which Q and R are formed.
-
-    #      Specifically, R is the upper triangle of H, the Householder vectors
-    #      mapping A to R are the lower triangle, and the normalizations of those
-    #      vectors in a certain sense are stored in tau.
-
-    #      This routine explicitly forms
-    #      Q from these outputs using qr.factored_to_Q, checks that Q is
-    #      unitary, and that QR = A
-    #      to within Frobenius norm 'thresh'.
-    #      """
-    #      def impl(A, paramtup):
-    #          m, n, dtype = paramtup
-    #          if n > m:
-    #              with self.assertRaises(NotImplementedError):
-    #                  H, betas = qr.house_qr(A, mode="factored")
-    #              return
-    #          H, betas = qr.house_qr(A, mode="factored")
-    #          jaxQ, jaxR = qr.factored_to_QR(H, betas)
-    #          Id = jnp.eye(jaxQ.shape[0], dtype=A.dtype)
-    #          errormsg = ""
-    #          success = True
-
-    #          unitary_check1 = jnp.dot(jaxQ, dag(jaxQ))
-    #          error1, errormsg1 = errstring(unitary_check1, "Q Qdag", Id, "I")
-    #          if error1 > thresh:
-    #              success = False
-    #              errormsg += "Q wasn't unitary. \n" + errormsg1 + "\n"
-
-    #          unitary_check2 = jnp.dot(dag(jaxQ), jaxQ)
-    #          error2, errormsg2 = errstring(unitary_check2, "Qdag Q", Id, "I")
-    #          if error2 > thresh:
-    #              success = False
-    #              errormsg += "Q wasn't unitary. \n" + errormsg2 + "\n"
-
-    #          nullopcheck = jnp.dot(jaxQ, jaxR)
-    #          error3, errormsg3 = errstring(nullopcheck, "QR", A, "A")
-    #          if error3 > thresh:
-    #              errormsg += "QR != A. \n" + errormsg3 + "\n"
-    #              success = False
-
-    #          self.assertTrue(success, msg=errormsg)
-    #      self.iterloop(impl)
 
-    #  def test_WY_Q_properties(self, thresh=1E-6):
-    #      """
-    #      Runs the qr decomposition in 'WY' mode. WY mode returns
-    #      matrices W and Y, storing the same Householder transformations as
-    #      'factored' mode in a 'blocked' representation permitting their
-    #      application using Level 3 BLAS operations.
-
-    #      This routine explicitly forms
-    #      Q from these outputs using qr.factored_to_Q. It checks that Q is
-    #      unitary, and that QR = A
-    #      to within Frobenius norm 'thresh'.
-    #      """
-    #      def impl(A, paramtup):
-    #          m, n, dtype = paramtup
-    #          if n > m:
-    #              with self.assertRaises(NotImplementedError):
-    #                  H, betas = qr.house_qr(A, mode="WY")
-    #              return
-    #          W, YH, _ = qr.house_qr(A, mode="WY")
-    #          jaxQ = qr.WY_to_Q(W, YH)
-    #          jaxQdag = dag(jaxQ)
-    #          QQdag = jaxQ @ jaxQdag
-    #          Id = jnp.eye(QQdag.shape[0], dtype=QQdag.dtype)
-    #          err, errmsg = errstring(QQdag, "Qdag", Id, "I")
-    #          self.assertLessEqual(err, thresh, msg=errmsg)
 
-    #      self.iterloop(impl)
 
-    #  def test_WY_reconstruction(self, thresh=1E-6):
-    #      """
-    #      Runs the qr decomposition in 'WY' mode. WY mode returns
-    #      matrices W and Y, storing the same Householder transformations as
-    #      'factored' mode in a 'blocked' representation permitting their
-    #      application using Level 3 BLAS operations.
-
-    #      This routine explicitly forms
-    #      Q from these outputs using qr.factored_to_Q. It checks that Q is
-    #      unitary, and that QR = A
-    #      to within Frobenius norm 'thresh'.
-    #      """
-    #      def impl(A, paramtup):
-    #          m, n, dtype = paramtup
-    #          if n > m:
-    #              with self.assertRaises(NotImplementedError):
-    #                  H, betas = qr.house_qr(A, mode="WY")
-    #              return
-    #          W, YH, R = qr.house_qr(A, mode="WY")
-    #          Q = qr.WY_to_Q(W, YH)
-    #          A_recon = Q @ R
-    #          err, errmsg = errstring(A, "A", A_recon, "QR")
-    #          self.assertLessEqual(err, thresh, msg=errmsg)
 
-    #      self.iterloop(impl)
+    def test_forward_vs_backward_accumulation(self, thresh=1E-6):
+        """
+        Checks that Q computed from the factored representation gives the
+        same result when using either forward or backward accumulation.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                with self.assertRaises(NotImplementedError):
+                    H, betas = qr.house_qr(A, mode="factored")
+                return
+            H, betas = qr.house_qr(A, mode="factored")
+            Im = jnp.eye(m, dtype=A.dtype)
+            Qforward = qr.factored_rightmult(Im, H, betas)
+            Qbackward, R = qr.factored_to_QR(H, betas)
+            err, errmsg = errstring(Qforward, "Qforward", Qbackward,
+                                    "Qbackward")
+            self.assertTrue(err < thresh, msg=errmsg)
+        self.iterloop(impl)
 
-    #  def test_WY_to_Q(self, thresh=1E-6):
-    #      """
-    #      Makes sure that retrieval of Q from WY^H, Q = I - WY^H, works
-    #      correctly.
-    #      """
-    #      def impl(A, paramtup):
-    #          m, n, dtype = paramtup
-    #          W = A
-    #          YH = matutils.gaussian_random(shape=(n, m), dtype=dtype)
-    #          Id = jnp.eye(m, dtype=dtype)
-    #          Q = Id - W @ YH
-    #          Q2 = qr.WY_to_Q(W, YH)
-    #          err, errmsg = errstring(Q, "Q", Q2, "I-WY^H")
-    #          self.assertLessEqual(err, thresh, msg=errmsg)
-
-    #  def test_B_times_Q_WY(self, thresh=1E-6):
-    #      """
-    #      Makes sure that B * Q = B * (I - W Y^H) for Q = I - WY^H, where
-    #      the RHS is computed implicitly from W and YH.
-    #      """
-    #      def impl(A, paramtup):
-    #          m, n, dtype = paramtup
-    #          W = A
-    #          YH = matutils.gaussian_random(shape=(n, m), dtype=dtype)
-    #          B = matutils.gaussian_random(shape=(m, n), dtype=dtype)
-    #          Id = jnp.eye(m, dtype=dtype)
-    #          Q = Id - W @ YH
-    #          BQ = B@Q
-    #          BQ_WY = qr.B_times_Q_WY(B, W, YH)
-    #          err, errmsg = errstring(BQ, "BQ", BQ_WY, "B(I-WY^T)")
-    #          self.assertLessEqual(err, thresh, msg=errmsg)
-
-    #  def test_Qdag_WY_times_B(self, thresh=1E-6):
-    #      """
-    #      Makes sure that Q^H@B = (I - W Y^H)^H @ B  for Q = I - WY^H, where
-    #      the RHS is computed implicitly from W and YH.
-    #      """
-    #      def impl(A, paramtup):
-    #          m, n, dtype = paramtup
-    #          W = A
-    #          YH = matutils.gaussian_random(shape=(n, m), dtype=dtype)
-    #          B = matutils.gaussian_random(shape=(m, n), dtype=dtype)
-    #          Id = jnp.eye(m, dtype=dtype)
-    #          Q = Id - W @ YH
-
-    #          QHB = dag(Q)@B
-    #          QHB_WY = qr.Qdag_WY_times_B(B, W, YH)
-    #          err, errmsg = errstring(QHB, "QHB", QHB_WY, "(I-WY^T)^H @ B")
-    #          self.assertLessEqual(err, thresh, msg=errmsg)
+    def test_factored_mult(self, thresh=1E-5):
+        """
+        A = QR -> [H, tau] is computed. R is extracted. We compare
+        C * A with C * Q * R without forming Q explicitly.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+
+            C = matutils.gaussian_random(shape=(n, m), dtype=dtype)
+            if n > m:
+                with self.assertRaises(NotImplementedError):
+                    H, betas = qr.house_qr(A, mode="factored")
+                return
+            H, betas = qr.house_qr(A, mode="factored")
+            R = jnp.triu(H)
+
+            CA = jnp.dot(C, A)
+            CQ = qr.factored_rightmult(C, H, betas)
+            CQR = CQ@R
+            err, errmsg = errstring(CA, "CA", CQR, "CQR")
+            self.assertTrue(err < thresh, msg=errmsg)
+        self.iterloop(impl)
+
+    def test_times_householder_vector(self, thresh=1E-6):
+        """
+        Checks that qr.times_householder_vector(C, H, j) agrees with C @ v_j,
+        where v_j is formed explicitly from the j'th column of H: zero above
+        the diagonal, 1 on it, and H[j+1:, j] below.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                return
+            H, betas = qr.house_qr(A, mode="factored")
+            C = matutils.gaussian_random(shape=(n, m), dtype=dtype)
+            for j in range(n):
+                v = jnp.concatenate([jnp.zeros(j, dtype=H.dtype),
+                                     jnp.ones(1, dtype=H.dtype),
+                                     H[j+1:, j]])
+                Cv = C @ v
+                Cv_H = qr.times_householder_vector(C, H, j)
+                err, errmsg = errstring(Cv, "Cv", Cv_H, "C @ v_j")
+                self.assertLessEqual(err, thresh, msg=errmsg)
+        self.iterloop(impl)
+
+    def test_factored_to_dense_Q(self, thresh=1E-6):
+        """
+        Runs the qr decomposition in 'factored' mode. Factored mode returns
+        matrices H and tau that record the Householder transformations
+        from which Q and R are formed.
+
+        Specifically, R is the upper triangle of H, the Householder vectors
+        mapping A to R are the lower triangle, and the normalizations of those
+        vectors in a certain sense are stored in tau.
+
+        This routine explicitly forms
+        Q from these outputs using qr.factored_to_QR, checks that Q is
+        unitary, and that QR = A
+        to within Frobenius norm 'thresh'.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                with self.assertRaises(NotImplementedError):
+                    H, betas = qr.house_qr(A, mode="factored")
+                return
+            H, betas = qr.house_qr(A, mode="factored")
+            jaxQ, jaxR = qr.factored_to_QR(H, betas)
+            Id = jnp.eye(jaxQ.shape[0], dtype=A.dtype)
+            errormsg = ""
+            success = True
+
+            unitary_check1 = jnp.dot(jaxQ, dag(jaxQ))
+            error1, errormsg1 = errstring(unitary_check1, "Q Qdag", Id, "I")
+            if error1 > thresh:
+                success = False
+                errormsg += "Q wasn't unitary. \n" + errormsg1 + "\n"
+
+            unitary_check2 = jnp.dot(dag(jaxQ), jaxQ)
+            error2, errormsg2 = errstring(unitary_check2, "Qdag Q", Id, "I")
+            if error2 > thresh:
+                success = False
+                errormsg += "Q wasn't unitary. \n" + errormsg2 + "\n"
+
+            nullopcheck = jnp.dot(jaxQ, jaxR)
+            error3, errormsg3 = errstring(nullopcheck, "QR", A, "A")
+            if error3 > thresh:
+                errormsg += "QR != A. \n" + errormsg3 + "\n"
+                success = False
+
+            self.assertTrue(success, msg=errormsg)
+        self.iterloop(impl)
+
+    def test_WY_Q_properties(self, thresh=1E-6):
+        """
+        Runs the qr decomposition in 'WY' mode. WY mode returns
+        matrices W and Y, storing the same Householder transformations as
+        'factored' mode in a 'blocked' representation permitting their
+        application using Level 3 BLAS operations.
+
+        This routine explicitly forms
+        Q from these outputs using qr.WY_to_Q. It checks that Q is
+        unitary, and that QR = A
+        to within Frobenius norm 'thresh'.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                with self.assertRaises(NotImplementedError):
+                    H, betas = qr.house_qr(A, mode="WY")
+                return
+            W, YH, _ = qr.house_qr(A, mode="WY")
+            jaxQ = qr.WY_to_Q(W, YH)
+            jaxQdag = dag(jaxQ)
+            QQdag = jaxQ @ jaxQdag
+            Id = jnp.eye(QQdag.shape[0], dtype=QQdag.dtype)
+            err, errmsg = errstring(QQdag, "Qdag", Id, "I")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+
+        self.iterloop(impl)
+
+    def test_WY_reconstruction(self, thresh=1E-6):
+        """
+        Runs the qr decomposition in 'WY' mode. WY mode returns
+        matrices W and Y, storing the same Householder transformations as
+        'factored' mode in a 'blocked' representation permitting their
+        application using Level 3 BLAS operations.
+
+        This routine explicitly forms
+        Q from these outputs using qr.WY_to_Q. It checks that Q is
+        unitary, and that QR = A
+        to within Frobenius norm 'thresh'.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            if n > m:
+                with self.assertRaises(NotImplementedError):
+                    H, betas = qr.house_qr(A, mode="WY")
+                return
+            W, YH, R = qr.house_qr(A, mode="WY")
+            Q = qr.WY_to_Q(W, YH)
+            A_recon = Q @ R
+            err, errmsg = errstring(A, "A", A_recon, "QR")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+
+        self.iterloop(impl)
+
+    def test_WY_to_Q(self, thresh=1E-6):
+        """
+        Makes sure that retrieval of Q from WY^H, Q = I - WY^H, works
+        correctly.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            W = A
+            YH = matutils.gaussian_random(shape=(n, m), dtype=dtype)
+            Id = jnp.eye(m, dtype=dtype)
+            Q = Id - W @ YH
+            Q2 = qr.WY_to_Q(W, YH)
+            err, errmsg = errstring(Q, "Q", Q2, "I-WY^H")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+        self.iterloop(impl)
+
+    def test_B_times_Q_WY(self, thresh=1E-6):
+        """
+        Makes sure that B * Q = B * (I - W Y^H) for Q = I - WY^H, where
+        the RHS is computed implicitly from W and YH.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            W = A
+            YH = matutils.gaussian_random(shape=(n, m), dtype=dtype)
+            B = matutils.gaussian_random(shape=(n, m), dtype=dtype)
+            Id = jnp.eye(m, dtype=dtype)
+            Q = Id - W @ YH
+            BQ = B@Q
+            BQ_WY = qr.B_times_Q_WY(B, W, YH)
+            err, errmsg = errstring(BQ, "BQ", BQ_WY, "B(I-WY^T)")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+        self.iterloop(impl)
+
+    def test_Qdag_WY_times_B(self, thresh=1E-6):
+        """
+        Makes sure that Q^H@B = (I - W Y^H)^H @ B  for Q = I - WY^H, where
+        the RHS is computed implicitly from W and YH.
+        """
+        def impl(A, paramtup):
+            m, n, dtype = paramtup
+            W = A
+            YH = matutils.gaussian_random(shape=(n, m), dtype=dtype)
+            B = matutils.gaussian_random(shape=(m, n), dtype=dtype)
+            Id = jnp.eye(m, dtype=dtype)
+            Q = Id - W @ YH
+
+            QHB = dag(Q)@B
+            QHB_WY = qr.Qdag_WY_times_B(B, W, YH)
+            err, errmsg = errstring(QHB, "QHB", QHB_WY, "(I-WY^T)^H @ B")
+            self.assertLessEqual(err, thresh, msg=errmsg)
+        self.iterloop(impl)
 
 class TestRandSVD(GaussianMatrixTest):
     """